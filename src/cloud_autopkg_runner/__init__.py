@@ -13,14 +13,22 @@ Key features include:
 - Metadata caching to reduce redundant downloads.
 """
 
+import atexit
 import logging
+import logging.handlers
+import queue
 import sys
 from pathlib import Path
 from typing import Optional
 
+from cloud_autopkg_runner.exceptions import AutoPkgRunnerException
+
 # Create a logger instance
 logger: logging.Logger = logging.getLogger(__name__)
 
+DEFAULT_MAX_CONCURRENCY: int = 8
+"""Default maximum number of recipes to run at the same time."""
+
 
 class AppConfig:
     """Manages application-wide configuration settings.
@@ -32,9 +40,13 @@ class AppConfig:
     and the metadata cache file path.
     """
 
+    _VERBOSITY_STRINGS: tuple[str, ...] = ("", "-v", "-vv", "-vvv", "-vvvv")
+
     _autopkg_prefs = {}
     _cache_file: Path = Path()
     _log_file: Optional[str] = None
+    _log_listener: Optional[logging.handlers.QueueListener] = None
+    _max_concurrency: int = DEFAULT_MAX_CONCURRENCY
     _verbosity_level: int = 0
 
     @classmethod
@@ -43,22 +55,35 @@ class AppConfig:
         verbosity_level: int,
         log_file: Optional[str] = None,
         cache_file: str = "metadata_cache.json",
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
     ) -> None:
         """Set the application configuration parameters.
 
         This method updates the class variables that store the verbosity
-        level, log file path, and cache file path. It does *not* initialize
-        the logging system; `initialize_logger()` must be called separately.
+        level, log file path, cache file path, and recipe concurrency. It does
+        *not* initialize the logging system; `initialize_logger()` must be
+        called separately.
 
         Args:
             verbosity_level: The integer verbosity level (0, 1, 2, etc.).
             log_file: Optional path to the log file. If specified, logging
                 output will be written to this file in addition to the console.
             cache_file: The path to the cache file.
+            max_concurrency: The maximum number of recipes to run at the same
+                time. Must be at least 1.
+
+        Raises:
+            AutoPkgRunnerException: If `max_concurrency` is less than 1.
         """
+        if max_concurrency < 1:
+            raise AutoPkgRunnerException(
+                f"max_concurrency must be at least 1, got {max_concurrency}"
+            )
+
         cls._verbosity_level = verbosity_level
         cls._log_file = log_file
         cls._cache_file = Path(cache_file)
+        cls._max_concurrency = max_concurrency
 
     @classmethod
     def initialize_logger(cls) -> None:
@@ -71,11 +96,25 @@ class AppConfig:
 
         The logging formatters include the module name, log level, and message,
         with the file handler also including a timestamp.
+
+        Records are passed to the handlers through a `QueueHandler`, and a
+        `QueueListener` thread does the formatting and I/O, so logging does not
+        block the event loop. The listener is stopped at interpreter exit.
+
+        Any handlers left over from a previous call are removed and closed
+        first, so calling this method again reconfigures logging instead of
+        emitting every record more than once.
         """
         log_levels = [logging.WARNING, logging.INFO, logging.DEBUG]
         level = log_levels[min(cls._verbosity_level, len(log_levels) - 1)]
 
+        cls.stop_logger()
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+            handler.close()
+
         logger.setLevel(logging.DEBUG)
+        handlers: list[logging.Handler] = []
 
         # Console handler
         console_handler = logging.StreamHandler(sys.stdout)
@@ -84,7 +123,7 @@ class AppConfig:
             "%(module)-20s %(levelname)-8s %(message)s"
         )
         console_handler.setFormatter(console_formatter)
-        logger.addHandler(console_handler)
+        handlers.append(console_handler)
 
         # File handler (optional)
         if cls._log_file:
@@ -95,7 +134,36 @@ class AppConfig:
                 datefmt="%m-%d %H:%M",
             )
             file_handler.setFormatter(file_formatter)
-            logger.addHandler(file_handler)
+            handlers.append(file_handler)
+
+        # Drop records that no handler wants before they are queued
+        log_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+        queue_handler = logging.handlers.QueueHandler(log_queue)
+        queue_handler.setLevel(min(handler.level for handler in handlers))
+        logger.addHandler(queue_handler)
+
+        cls._log_listener = logging.handlers.QueueListener(
+            log_queue, *handlers, respect_handler_level=True
+        )
+        cls._log_listener.start()
+        # Re-initializing must not register another exit hook
+        atexit.unregister(cls.stop_logger)
+        atexit.register(cls.stop_logger)
+
+    @classmethod
+    def stop_logger(cls) -> None:
+        """Stop the background logging thread.
+
+        Processes any queued log records, then closes the handlers created by
+        `initialize_logger()`. Does nothing if logging is not running.
+        """
+        if cls._log_listener is None:
+            return
+
+        cls._log_listener.stop()
+        for handler in cls._log_listener.handlers:
+            handler.close()
+        cls._log_listener = None
 
     @classmethod
     def cache_file(cls) -> Path:
@@ -111,6 +179,11 @@ class AppConfig:
         """
         return cls._log_file
 
+    @classmethod
+    def max_concurrency(cls) -> int:
+        """Returns the maximum number of recipes to run at the same time."""
+        return cls._max_concurrency
+
     @classmethod
     def verbosity_int(cls, delta: int = 0) -> int:
         """Returns the verbosity level.
@@ -147,4 +220,6 @@ class AppConfig:
         level = cls._verbosity_level + delta
         if level <= 0:
             return ""
+        if level < len(cls._VERBOSITY_STRINGS):
+            return cls._VERBOSITY_STRINGS[level]
         return "-" + "v" * level
@@ -13,28 +13,41 @@ execute these tasks efficiently.
 """
 
 import asyncio
-import json
+import functools
 import os
 import signal
+import stat
 import sys
 import tempfile
-from argparse import ArgumentParser, Namespace
+from argparse import ArgumentParser, ArgumentTypeError, Namespace
 from pathlib import Path
 from types import FrameType
 from typing import Iterable, NoReturn, Optional
 
-from cloud_autopkg_runner import AppConfig, logger
+import orjson
+
+try:
+    import uvloop  # pyright: ignore[reportMissingImports]
+except ImportError:  # Optional `uvloop` extra
+    uvloop = None
+
+from cloud_autopkg_runner import DEFAULT_MAX_CONCURRENCY, AppConfig, logger
 from cloud_autopkg_runner.autopkg_prefs import AutoPkgPrefs
 from cloud_autopkg_runner.exceptions import AutoPkgRunnerException
-from cloud_autopkg_runner.metadata_cache import create_dummy_files, load_metadata_cache
+from cloud_autopkg_runner.metadata_cache import (
+    create_dummy_files,
+    flush_metadata_cache,
+    load_metadata_cache,
+)
 from cloud_autopkg_runner.recipe import ConsolidatedReport, Recipe
 
 
-def generate_recipe_list(args: Namespace) -> set[str]:
+def generate_recipe_list(args: Namespace) -> list[str]:
     """Combine the various inputs to generate a comprehensive list of recipes to run.
 
     Aggregates recipe names from a JSON file, command-line arguments, and the 'RECIPE'
-    environment variable. Ensures the final list contains only unique recipe names.
+    environment variable. Ensures the final list contains only unique recipe names,
+    sorted so that recipes are scheduled in a deterministic order.
 
     Args:
         args: A Namespace object containing parsed command-line arguments, including:
@@ -42,7 +55,7 @@ def generate_recipe_list(args: Namespace) -> set[str]:
             - recipe (list[str]): List of recipe names passed directly as arguments.
 
     Returns:
-        A set of strings, where each string is a recipe name.
+        A sorted list of strings, where each string is a unique recipe name.
 
     Raises:
         AutoPkgRunnerException: If the JSON file specified by 'args.recipe_list'
@@ -53,9 +66,22 @@ def generate_recipe_list(args: Namespace) -> set[str]:
     output: set[str] = set()
 
     if args.recipe_list:
+        # Read regular files in a single unbuffered read; pipes and other
+        # special files (e.g. /dev/stdin) report no size, so read them to EOF
+        fd = os.open(args.recipe_list, os.O_RDONLY)
+        try:
+            st = os.fstat(fd)
+            if stat.S_ISREG(st.st_mode):
+                recipe_list_bytes = os.read(fd, st.st_size)
+            else:
+                with os.fdopen(fd, "rb", closefd=False) as recipe_list_file:
+                    recipe_list_bytes = recipe_list_file.read()
+        finally:
+            os.close(fd)
+
         try:
-            output.update(json.loads(Path(args.recipe_list).read_text()))
-        except json.JSONDecodeError as exc:
+            output.update(orjson.loads(recipe_list_bytes))
+        except orjson.JSONDecodeError as exc:
             raise AutoPkgRunnerException(
                 f"Invalid file contents in {args.recipe_list}"
             ) from exc
@@ -63,23 +89,47 @@ def generate_recipe_list(args: Namespace) -> set[str]:
     if args.recipe:
         output.update(args.recipe)
 
-    if os.getenv("RECIPE"):
-        output.add(os.getenv("RECIPE", ""))
+    recipe_env = os.getenv("RECIPE")
+    if recipe_env:
+        output.add(recipe_env)
 
-    logger.debug(f"Recipe list generated: {output}")
-    return output
+    recipe_list = sorted(output)
+    logger.debug("Recipe list generated: %s", recipe_list)
+    return recipe_list
 
 
-def parse_arguments() -> Namespace:
-    """Parse command-line arguments using argparse.
+def _positive_int(value: str) -> int:
+    """Parse a command-line argument as an integer of at least 1.
 
-    Defines the expected command-line arguments and converts them into a Namespace
-    object for easy access. These arguments control the verbosity level,
-    specify recipes to run, provide a path to a list of recipes in JSON format,
-    and allow customization of the cache file and log file locations.
+    Args:
+        value: The argument as given on the command line.
 
     Returns:
-        A Namespace object containing the parsed command-line arguments.
+        The parsed integer.
+
+    Raises:
+        ArgumentTypeError: If the value is not an integer, or is less than 1.
+    """
+    try:
+        number = int(value)
+    except ValueError:
+        raise ArgumentTypeError(f"invalid int value: {value!r}") from None
+    if number < 1:
+        raise ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+
+@functools.cache
+def _build_parser() -> ArgumentParser:
+    """Build the command-line argument parser.
+
+    Defines the expected command-line arguments. These arguments control the
+    verbosity level, specify recipes to run, provide a path to a list of
+    recipes in JSON format, and allow customization of the cache file and log
+    file locations. The parser is built on first use and then reused.
+
+    Returns:
+        The configured ArgumentParser.
     """
     parser = ArgumentParser()
     parser.add_argument(
@@ -106,12 +156,60 @@ def parse_arguments() -> Namespace:
         help="Path to the file that stores the download metadata cache.",
         type=Path,
     )
+    parser.add_argument(
+        "--max-concurrency",
+        default=DEFAULT_MAX_CONCURRENCY,
+        help="Maximum number of recipes to run at the same time.",
+        type=_positive_int,
+    )
     parser.add_argument(
         "--log-file",
         help="Path to the log file. If not specified, no file logging will occur.",
         type=Path,
     )
-    return parser.parse_args()
+    return parser
+
+
+def parse_arguments() -> Namespace:
+    """Parse command-line arguments using argparse.
+
+    Converts the command-line arguments into a Namespace object for easy
+    access, using the parser from `_build_parser()`.
+
+    Returns:
+        A Namespace object containing the parsed command-line arguments.
+    """
+    return _build_parser().parse_args()
+
+
+def _find_recipe(
+    recipe_name: str, overrides_paths: list[Path], override_index: dict[str, Path]
+) -> Optional[Path]:
+    """Find a recipe file in the override directories.
+
+    Plain file names are looked up in `override_index` first. Names that
+    contain a path separator or are absolute, and names missing from the
+    index, are resolved by checking each override directory in order. This
+    also covers relative subdirectory paths, absolute paths, and filesystems
+    that match names case-insensitively.
+
+    Args:
+        recipe_name: The recipe name, as requested by the user.
+        overrides_paths: The expanded override directories, in search order.
+        override_index: The top-level entries of the override directories,
+            mapping each name to the path in the first directory containing it.
+
+    Returns:
+        The path to the recipe file, or None if it was not found.
+    """
+    if os.sep not in recipe_name and recipe_name in override_index:
+        return override_index[recipe_name]
+
+    for overrides_path in overrides_paths:
+        recipe_path = overrides_path / recipe_name
+        if recipe_path.exists():
+            return recipe_path
+    return None
 
 
 async def process_recipe_list(
@@ -119,10 +217,15 @@ async def process_recipe_list(
 ) -> None:
     """Process a list of recipe names to create Recipe objects and run them in parallel.
 
-    Creates `Recipe` objects from a list of recipe names and then executes them
-    concurrently using a `ThreadPoolExecutor`.  It searches for each recipe
-    in the specified override directories and creates a `Recipe` object
-    if the recipe file is found.
+    Searches for each recipe in the specified override directories, then runs
+    the recipes that were found concurrently with `asyncio.gather`, limited to
+    `AppConfig.max_concurrency()` recipes at a time. Each `Recipe` object is
+    only created once its run is admitted, so at most that many recipes are
+    held in memory at once.
+
+    Once all recipes have finished, the download metadata they queued is
+    written to `AppConfig.cache_file()` with a single flush. The flush also
+    runs if processing is interrupted, so completed recipes are saved.
 
     Args:
         overrides_paths: A list of paths to AutoPkg recipe override directories.
@@ -131,22 +234,53 @@ async def process_recipe_list(
         working_dir: The temporary directory where the recipes will be run.
 
     Raises:
-        (Exceptions raised within `run_recipe` are caught and logged as warnings.
-        Exceptions during `Recipe` object creation are not explicitly handled.)
+        (Exceptions raised while creating or running a recipe are caught and
+        logged as warnings.)
     """
     logger.debug("Processing recipes...")
 
-    recipes: list[Recipe] = []
+    expanded_overrides = [path.expanduser() for path in overrides_paths]
+
+    # Index each directory once; earlier directories take precedence
+    override_index: dict[str, Path] = {}
+    for overrides_path in expanded_overrides:
+        try:
+            with os.scandir(overrides_path) as entries:
+                for entry in entries:
+                    override_index.setdefault(entry.name, Path(entry.path))
+        except OSError:
+            logger.debug("Skipping unreadable override directory: %s", overrides_path)
+
+    recipe_names: list[str] = []
+    recipe_paths: list[Path] = []
     for recipe_name in recipe_list:
-        for overrides_path in overrides_paths:
-            recipe_path = Path(overrides_path).expanduser() / recipe_name
-            if recipe_path.exists():
-                recipes.append(Recipe(recipe_path, working_dir))
-                break
+        recipe_path = _find_recipe(recipe_name, expanded_overrides, override_index)
+        if recipe_path is None:
+            logger.warning("Recipe not found in override directories: %s", recipe_name)
+            continue
+        recipe_names.append(recipe_name)
+        recipe_paths.append(recipe_path)
+
+    semaphore = asyncio.Semaphore(AppConfig.max_concurrency())
+
+    async def run_recipe(recipe_path: Path) -> ConsolidatedReport:
+        async with semaphore:
+            return await Recipe(recipe_path, working_dir).run()
+
+    try:
+        results = await asyncio.gather(
+            *(run_recipe(recipe_path) for recipe_path in recipe_paths),
+            return_exceptions=True,
+        )
+    finally:
+        flush_metadata_cache(AppConfig.cache_file())
 
     recipe_output: dict[str, ConsolidatedReport] = {}
-    for recipe in recipes:
-        recipe_output[recipe.name] = await recipe.run()
+    for recipe_name, result in zip(recipe_names, results):
+        if isinstance(result, BaseException):
+            logger.warning("Failed to run %s: %s", recipe_name, result)
+            continue
+        recipe_output[recipe_name] = result
 
 
 def signal_handler(sig: int, _frame: Optional[FrameType]) -> NoReturn:
@@ -161,7 +295,7 @@ def signal_handler(sig: int, _frame: Optional[FrameType]) -> NoReturn:
         sig: The signal number (an integer).
         _frame:  Unused frame object.  Required by signal.signal().
     """
-    logger.error(f"Signal {sig} received. Exiting...")
+    logger.error("Signal %s received. Exiting...", sig)
     sys.exit(0)  # Trigger a normal exit
 
 
@@ -177,12 +311,16 @@ async def async_main() -> None:
       to simulate previous downloads for testing or development.
     - Retrieves AutoPkg preferences from the user's system.
     - Processes the recipe list using AutoPkg override directories,
-      running each recipe asynchronously.
+      running each recipe asynchronously and writing the metadata collected
+      from the runs to the cache file in a single update.
     """
     args = parse_arguments()
 
     AppConfig.set_config(
-        verbosity_level=args.verbose, log_file=args.log_file, cache_file=args.cache_file
+        verbosity_level=args.verbose,
+        log_file=args.log_file,
+        cache_file=args.cache_file,
+        max_concurrency=args.max_concurrency,
     )
     AppConfig.initialize_logger()
 
@@ -196,11 +334,23 @@ async def async_main() -> None:
 
     with tempfile.TemporaryDirectory(prefix="autopkg_") as temp_dir_str:
         temp_working_dir = Path(temp_dir_str)
-        logger.debug(f"Temporary directory created: {temp_working_dir}")
+        logger.debug("Temporary directory created: %s", temp_working_dir)
 
         await process_recipe_list(overrides_dir, recipe_list, temp_working_dir)
 
 
+def _uvloop_requested() -> bool:
+    """Check whether the event loop should run on uvloop.
+
+    uvloop is an optional dependency (the `uvloop` extra) and is only used
+    when the `CLOUD_AUTOPKG_UVLOOP` environment variable is set to `1`.
+
+    Returns:
+        True if uvloop was requested, otherwise False.
+    """
+    return sys.platform != "win32" and os.getenv("CLOUD_AUTOPKG_UVLOOP") == "1"
+
+
 def main() -> None:
     """Entry point for the script.
 
@@ -214,7 +364,17 @@ def main() -> None:
     signal.signal(signal.SIGINT, signal_handler)  # Ctrl+C
     signal.signal(signal.SIGTERM, signal_handler)  # `kill` command
 
-    asyncio.run(async_main())
+    if not _uvloop_requested():
+        asyncio.run(async_main())
+    elif uvloop is None:
+        logger.warning("CLOUD_AUTOPKG_UVLOOP is set, but uvloop is not installed.")
+        asyncio.run(async_main())
+    elif sys.version_info >= (3, 12):
+        asyncio.run(async_main(), loop_factory=uvloop.new_event_loop)
+    else:
+        # asyncio.run() only accepts a loop factory from Python 3.12 on
+        uvloop.install()
+        asyncio.run(async_main())
 
 
 if __name__ == "__main__":
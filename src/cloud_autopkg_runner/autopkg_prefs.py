@@ -17,12 +17,42 @@ Key preferences managed include:
 - Recipe override directories (`RECIPE_OVERRIDE_DIRS`)
 """
 
+import functools
 import plistlib
 from pathlib import Path
-from typing import Any, Literal, Optional, TypeVar, Union, overload
+from typing import Any, Literal, Optional, TypeVar, Union, cast, overload
 
 T = TypeVar("T")
 
+
+@functools.lru_cache(maxsize=256)
+def _expand(path: str) -> Path:
+    """Converts a string to a `Path` with `~` expanded.
+
+    AutoPkg uses a small, fixed set of home-relative paths, so the results are
+    cached to avoid repeating the home directory lookup.
+
+    Args:
+        path: The path to convert.
+
+    Returns:
+        The path as a `Path` object, with `~` expanded.
+    """
+    return Path(path).expanduser()
+
+
+_DEFAULT_PREFS: dict[str, Any] = {
+    "CACHE_DIR": _expand("~/Library/AutoPkg/Cache"),
+    "RECIPE_SEARCH_DIRS": [
+        Path("."),
+        _expand("~/Library/AutoPkg/Recipes"),
+        Path("/Library/AutoPkg/Recipes"),
+    ],
+    "RECIPE_OVERRIDE_DIRS": [_expand("~/Library/AutoPkg/RecipeOverrides")],
+    "RECIPE_REPO_DIR": _expand("~/Library/AutoPkg/RecipeRepos"),
+}
+"""Default values for AutoPkg preferences that are not set in the plist file."""
+
 # Overload key sources:
 # - https://github.com/autopkg/autopkg/wiki/Preferences
 # - https://github.com/grahampugh/jamf-upload/wiki/JamfUploader-AutoPkg-Processors
@@ -35,6 +65,99 @@ T = TypeVar("T")
 # - https://github.com/hjuutilainen/autopkg-virustotalanalyzer/blob/master/README.md
 
 
+def _copy_containers(value: Any) -> Any:
+    """Copies the lists and dictionaries in a preference value.
+
+    Other values, such as strings, numbers and `Path` objects, are immutable
+    and are returned as-is, which is much cheaper than `copy.deepcopy`.
+
+    Args:
+        value: The preference value to copy.
+
+    Returns:
+        The value, with all nested lists and dictionaries copied.
+    """
+    if isinstance(value, list):
+        return [_copy_containers(item) for item in cast(list[Any], value)]
+    if isinstance(value, dict):
+        return {
+            key: _copy_containers(item)
+            for key, item in cast(dict[Any, Any], value).items()
+        }
+    return value
+
+
+def _load_prefs(plist_path: Path) -> dict[str, Any]:
+    """Loads and normalizes the preferences stored in a plist file.
+
+    The result is cached per path and modification time, so creating several
+    `AutoPkgPrefs` objects only parses the plist once, while edits to the file
+    are still picked up. The returned dictionary and its values are shared
+    between callers, so callers must copy it with `_copy_containers` before
+    modifying it.
+
+    Args:
+        plist_path: The resolved path to the plist file.
+
+    Returns:
+        A dictionary of the preferences with known keys converted to the
+        appropriate Python types.
+
+    Raises:
+        FileNotFoundError: If the specified plist file does not exist.
+        ValueError: If the specified plist file is invalid.
+    """
+    try:
+        mtime_ns = plist_path.stat().st_mtime_ns
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Plist file not found: {plist_path}")
+    return _parse_prefs(plist_path, mtime_ns)
+
+
+@functools.lru_cache(maxsize=8)
+def _parse_prefs(plist_path: Path, mtime_ns: int) -> dict[str, Any]:
+    """Parses and normalizes the preferences stored in a plist file.
+
+    Args:
+        plist_path: The resolved path to the plist file.
+        mtime_ns: The modification time of the plist file in nanoseconds.
+            Only used as part of the cache key.
+
+    Returns:
+        A dictionary of the preferences with known keys converted to the
+        appropriate Python types.
+
+    Raises:
+        FileNotFoundError: If the specified plist file does not exist.
+        ValueError: If the specified plist file is invalid.
+    """
+    try:
+        prefs: dict[str, Any] = plistlib.loads(plist_path.read_bytes())
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Plist file not found: {plist_path}")
+    except plistlib.InvalidFileException:
+        raise ValueError(f"Invalid plist file: {plist_path}")
+
+    # Force into lists to reduce branching logic
+    if isinstance(prefs["RECIPE_SEARCH_DIRS"], str):
+        prefs["RECIPE_SEARCH_DIRS"] = [prefs["RECIPE_SEARCH_DIRS"]]
+    if isinstance(prefs["RECIPE_OVERRIDE_DIRS"], str):
+        prefs["RECIPE_OVERRIDE_DIRS"] = [prefs["RECIPE_OVERRIDE_DIRS"]]
+
+    # Convert `str` to `Path`
+    if "CACHE_DIR" in prefs:
+        prefs["CACHE_DIR"] = _expand(prefs["CACHE_DIR"])
+    if "RECIPE_REPO_DIR" in prefs:
+        prefs["RECIPE_REPO_DIR"] = _expand(prefs["RECIPE_REPO_DIR"])
+    if "MUNKI_REPO" in prefs:
+        prefs["MUNKI_REPO"] = _expand(prefs["MUNKI_REPO"])
+
+    prefs["RECIPE_SEARCH_DIRS"] = [_expand(x) for x in prefs["RECIPE_SEARCH_DIRS"]]
+    prefs["RECIPE_OVERRIDE_DIRS"] = [_expand(x) for x in prefs["RECIPE_OVERRIDE_DIRS"]]
+
+    return prefs
+
+
 class AutoPkgPrefs:
     """Manages AutoPkg preferences loaded from a plist file.
 
@@ -51,7 +174,8 @@ class AutoPkgPrefs:
 
         Loads the contents of the plist file, separates the known preferences
         from the extra preferences, and creates a new
-        AutoPkgPrefs object.
+        AutoPkgPrefs object. The parsed plist is cached, so subsequent
+        objects created from the same file do not parse it again.
 
         Args:
             plist_path: The path to the plist file. If None, defaults to
@@ -62,53 +186,12 @@ class AutoPkgPrefs:
             ValueError: If the specified plist file is invalid.
         """
         if not plist_path:
-            plist_path = Path(
-                "~/Library/Preferences/com.github.autopkg.plist"
-            ).expanduser()
-
-        # Set defaults
-        self._prefs: dict[str, Any] = {
-            "CACHE_DIR": Path("~/Library/AutoPkg/Cache").expanduser(),
-            "RECIPE_SEARCH_DIRS": [
-                Path("."),
-                Path("~/Library/AutoPkg/Recipes").expanduser(),
-                Path("/Library/AutoPkg/Recipes"),
-            ],
-            "RECIPE_OVERRIDE_DIRS": [
-                Path("~/Library/AutoPkg/RecipeOverrides").expanduser()
-            ],
-            "RECIPE_REPO_DIR": Path("~/Library/AutoPkg/RecipeRepos").expanduser(),
-        }
+            plist_path = _expand("~/Library/Preferences/com.github.autopkg.plist")
 
-        try:
-            prefs: dict[str, Any] = plistlib.loads(plist_path.read_bytes())
-        except FileNotFoundError:
-            raise FileNotFoundError(f"Plist file not found: {plist_path}")
-        except plistlib.InvalidFileException:
-            raise ValueError(f"Invalid plist file: {plist_path}")
-
-        # Force into lists to reduce branching logic
-        if isinstance(prefs["RECIPE_SEARCH_DIRS"], str):
-            prefs["RECIPE_SEARCH_DIRS"] = [prefs["RECIPE_SEARCH_DIRS"]]
-        if isinstance(prefs["RECIPE_OVERRIDE_DIRS"], str):
-            prefs["RECIPE_OVERRIDE_DIRS"] = [prefs["RECIPE_OVERRIDE_DIRS"]]
-
-        # Convert `str` to `Path`
-        if "CACHE_DIR" in prefs:
-            prefs["CACHE_DIR"] = Path(prefs["CACHE_DIR"]).expanduser()
-        if "RECIPE_REPO_DIR" in prefs:
-            prefs["RECIPE_REPO_DIR"] = Path(prefs["RECIPE_REPO_DIR"]).expanduser()
-        if "MUNKI_REPO" in prefs:
-            prefs["MUNKI_REPO"] = Path(prefs["MUNKI_REPO"]).expanduser()
-
-        prefs["RECIPE_SEARCH_DIRS"] = map(
-            lambda x: Path(x).expanduser(), prefs["RECIPE_SEARCH_DIRS"]
+        # Copy the containers, so instances never share the cached lists
+        self._prefs: dict[str, Any] = _copy_containers(
+            {**_DEFAULT_PREFS, **_load_prefs(plist_path.resolve())}
         )
-        prefs["RECIPE_SEARCH_DIRS"] = map(
-            lambda x: Path(x).expanduser(), prefs["RECIPE_SEARCH_DIRS"]
-        )
-
-        self._prefs.update(prefs)
 
     @overload
     def __getitem__(self, key: Literal["CACHE_DIR", "RECIPE_REPO_DIR"]) -> Path: ...
@@ -1,12 +1,52 @@
 """Defines custom exception classes for the cloud-autopkg-runner package.
 
 These exceptions are used to provide more specific error handling and
-reporting within the application. They inherit from the `BaseException`
+reporting within the application. They inherit from the `Exception`
 class.
 """
 
+import shlex
+from typing import Sequence
 
-class AutoPkgRunnerException(BaseException):
+
+class AutoPkgRunnerException(Exception):
     """Base exception class for the AutoPkg runner."""
 
     pass
+
+
+class CommandFailedException(AutoPkgRunnerException):
+    """Raised when a command exits with a non-zero exit code.
+
+    The details of the failure are kept as attributes, and the message is
+    only formatted when the exception is converted to a string.
+
+    Attributes:
+        cmd: The command and its arguments.
+        returncode: The exit code of the command.
+        stdout: The standard output of the command, if it was captured.
+        stderr: The standard error of the command, if it was captured.
+    """
+
+    def __init__(
+        self, cmd: Sequence[str], returncode: int, stdout: str = "", stderr: str = ""
+    ) -> None:
+        """Initialize a CommandFailedException object.
+
+        Args:
+            cmd: The command and its arguments.
+            returncode: The exit code of the command.
+            stdout: The standard output of the command, if it was captured.
+            stderr: The standard error of the command, if it was captured.
+        """
+        super().__init__(cmd, returncode, stdout, stderr)
+        self.cmd = cmd
+        self.returncode = returncode
+        self.stdout = stdout
+        self.stderr = stderr
+
+    def __str__(self) -> str:
+        """Returns a message describing the failed command."""
+        return (
+            f"Command failed with exit code {self.returncode}: {shlex.join(self.cmd)}"
+        )
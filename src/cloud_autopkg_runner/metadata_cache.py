@@ -11,10 +11,13 @@ This information is used to create dummy files for testing purposes and
 to avoid unnecessary downloads.
 """
 
-import json
+import mmap
+import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Iterable, TypeAlias, TypedDict, cast
+from typing import Any, Iterable, TypeAlias, TypedDict, Union, cast
 
+import orjson
 import xattr  # pyright: ignore[reportMissingTypeStubs]
 
 from cloud_autopkg_runner import logger
@@ -57,22 +60,76 @@ This type alias represents the structure of the metadata cache, which is a
 dictionary mapping recipe names to `RecipeCache` objects.
 """
 
+ETAG_XATTR = b"com.github.autopkg.etag"
+"""Extended attribute AutoPkg uses to store a download's ETag."""
 
-def _set_file_size(file_path: Path, size: int) -> None:
-    """Set a file to a specified size by writing a null byte at the end.
+LAST_MODIFIED_XATTR = b"com.github.autopkg.last-modified"
+"""Extended attribute AutoPkg uses to store a download's Last-Modified date."""
+
+_pending_updates: MetadataCache = {}
+"""Metadata updates waiting to be written by `flush_metadata_cache`."""
+
+_loaded_caches: dict[Path, MetadataCache] = {}
+"""Metadata caches already read by `load_metadata_cache`, keyed by file path."""
+
+
+def _load_json_file(file_path: Path) -> Any:
+    """Parse a JSON file without reading it into an intermediate buffer.
+
+    The file is memory-mapped and the mapping is handed to `orjson` directly,
+    so the page cache backs the parser input. Empty files cannot be mapped and
+    are parsed as empty input instead.
+
+    Args:
+        file_path: The path to the JSON file.
+
+    Returns:
+        The parsed JSON contents.
+
+    Raises:
+        orjson.JSONDecodeError: If the file does not contain valid JSON.
+    """
+    with file_path.open("rb") as json_file:
+        if os.fstat(json_file.fileno()).st_size == 0:
+            return orjson.loads(b"")
+
+        with mmap.mmap(json_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            with memoryview(mapped) as view:
+                return orjson.loads(view)
+
+
+def _create_dummy_file(
+    file_path: Path, size: int, etag: str = "", last_modified: str = ""
+) -> None:
+    """Create a sparse file of a specified size with AutoPkg's download xattrs.
 
     Effectively replicates the behavior of `mkfile -n` on macOS. This function
     does not actually write `size` bytes of data, but rather sets the file's
     metadata to indicate that it is `size` bytes long.  This is used to
-    quickly create dummy files for testing.
+    quickly create dummy files for testing. The file is opened once and the
+    size and extended attributes are all set through that file descriptor.
 
     Args:
         file_path: The path to the file.
         size: The desired size of the file in bytes.
+        etag: The ETag to store in the `com.github.autopkg.etag` attribute.
+            Skipped if empty.
+        last_modified: The date to store in the
+            `com.github.autopkg.last-modified` attribute. Skipped if empty.
     """
-    with open(file_path, "wb") as f:
-        f.seek(int(size) - 1)
-        f.write(b"\0")
+    fd = os.open(file_path, os.O_CREAT | os.O_WRONLY, 0o644)
+    try:
+        os.ftruncate(fd, int(size))
+        if etag:
+            xattr.setxattr(  # pyright: ignore[reportUnknownMemberType]
+                fd, ETAG_XATTR, etag.encode("utf-8")
+            )
+        if last_modified:
+            xattr.setxattr(  # pyright: ignore[reportUnknownMemberType]
+                fd, LAST_MODIFIED_XATTR, last_modified.encode("utf-8")
+            )
+    finally:
+        os.close(fd)
 
 
 def create_dummy_files(recipe_list: Iterable[str], cache: MetadataCache):
@@ -87,68 +144,72 @@ def create_dummy_files(recipe_list: Iterable[str], cache: MetadataCache):
     allowing you to simulate previous downloads without actually downloading
     the files.
 
+    The files to create are collected first, and then created in parallel by a
+    thread pool, since the work is entirely filesystem calls that release the
+    GIL.
+
     Args:
         recipe_list: An iterable of recipe names to process.
         cache: The metadata cache dictionary.
     """
     logger.debug("Creating dummy files...")
 
+    wanted_recipes = set(recipe_list)
+
+    dummy_files: dict[Path, tuple[int, str, str]] = {}
     for recipe_name, recipe_cache_data in cache.items():
-        if recipe_name not in recipe_list:
+        if recipe_name not in wanted_recipes:
             continue
 
         logger.info(f"Creating dummy files for {recipe_name}...")
         for metadata_cache in recipe_cache_data.get("metadata", []):
-            if not metadata_cache.get("file_path"):
+            file_path_str = metadata_cache.get("file_path")
+            file_size = metadata_cache.get("file_size")
+            if not file_path_str:
                 logger.warning(
                     f"Skipping dummy file creation: Missing 'file_path' in {recipe_name} cache"
                 )
                 continue
-            if not metadata_cache.get("file_size"):
+            if not file_size:
                 logger.warning(
                     f"Skipping dummy file creation: Missing 'file_size' in {recipe_name} cache"
                 )
                 continue
 
-            file_path = Path(metadata_cache.get("file_path", ""))
-            if file_path.exists():
+            file_path = Path(file_path_str)
+            if file_path in dummy_files or file_path.exists():
                 logger.info(
                     f"Skipping dummy file creation: {file_path} already exists."
                 )
                 continue
 
-            # Create parent directory if needed
-            file_path.parent.mkdir(parents=True, exist_ok=True)
+            dummy_files[file_path] = (
+                file_size,
+                metadata_cache.get("etag", ""),
+                metadata_cache.get("last_modified", ""),
+            )
 
-            # Create file
-            file_path.touch()
+    # Create each parent directory once, before the files are created
+    for parent_dir in {file_path.parent for file_path in dummy_files}:
+        parent_dir.mkdir(parents=True, exist_ok=True)
 
-            # Set file size
-            _set_file_size(file_path, metadata_cache.get("file_size", 0))
-
-            # Set extended attributes
-            if metadata_cache.get("etag"):
-                xattr.setxattr(  # pyright: ignore[reportUnknownMemberType]
-                    file_path,
-                    "com.github.autopkg.etag",
-                    metadata_cache.get("etag", "").encode("utf-8"),
-                )
-            if metadata_cache.get("last_modified"):
-                xattr.setxattr(  # pyright: ignore[reportUnknownMemberType]
-                    file_path,
-                    "com.github.autopkg.last-modified",
-                    metadata_cache.get("last_modified", "").encode("utf-8"),
-                )
+    with ThreadPoolExecutor() as executor:
+        futures = [
+            executor.submit(_create_dummy_file, file_path, *attributes)
+            for file_path, attributes in dummy_files.items()
+        ]
+        for future in futures:
+            future.result()
 
     logger.debug("Dummy files created.")
     return
 
 
-def get_file_metadata(file_path: Path, attr: str) -> str:
+def get_file_metadata(file_path: Union[Path, int], attr: Union[str, bytes]) -> str:
     """Get extended file metadata.
 
     Args:
-        file_path: The path to the file.
+        file_path: The path to the file, or a file descriptor open on it.
         attr: the attribute of the extended metadata.
 
     Returns:
@@ -168,6 +229,10 @@ def load_metadata_cache(file_path: Path) -> MetadataCache:
     Reads the contents of the specified JSON file into a `MetadataCache` dictionary.
     If the file does not exist, it is created with an empty JSON object.
 
+    The loaded cache is also kept in memory for later saves to the same
+    file. Callers receive their own copy, so later saves do not change the
+    returned dictionary.
+
     Args:
         file_path: Path to the metadata cache JSON file.
 
@@ -185,13 +250,60 @@ def load_metadata_cache(file_path: Path) -> MetadataCache:
         logger.info(f"{file_path} created.")
 
     try:
-        metadata_cache = MetadataCache(json.loads(file_path.read_text()))
+        metadata_cache = MetadataCache(_load_json_file(file_path))
         logger.info(f"Metadata cache loaded from {file_path}.")
-    except json.JSONDecodeError as exc:
+    except orjson.JSONDecodeError as exc:
         raise AutoPkgRunnerException(f"Invalid file contents in {file_path}") from exc
 
     logger.debug(f"Metadata cache: {metadata_cache}")
-    return metadata_cache
+    _loaded_caches[file_path] = metadata_cache
+    return metadata_cache.copy()
+
+
+def _get_metadata_cache(file_path: Path) -> MetadataCache:
+    """Return the in-memory metadata cache for a file.
+
+    The file is only read if it has not already been loaded by this process.
+
+    Args:
+        file_path: Path to the metadata cache JSON file.
+
+    Returns:
+        The `MetadataCache` dictionary for the file.
+    """
+    if file_path not in _loaded_caches:
+        load_metadata_cache(file_path)
+    return _loaded_caches[file_path]
+
+
+def flush_metadata_cache(file_path: Path) -> None:
+    """Write all queued metadata updates to the cache.
+
+    Writes the updates collected by `queue_metadata_update` with a single
+    read and write of the cache file, then clears the queue. Does nothing if
+    no updates are queued.
+
+    Args:
+        file_path: The path to the metadata cache JSON file.
+    """
+    if not _pending_updates:
+        return
+
+    logger.debug(f"Flushing {len(_pending_updates)} metadata updates...")
+    save_metadata_cache_batch(file_path, _pending_updates)
+    _pending_updates.clear()
+
+
+def queue_metadata_update(recipe_name: str, metadata: RecipeCache) -> None:
+    """Queue a recipe's metadata to be saved by `flush_metadata_cache`.
+
+    A later update for the same recipe replaces the earlier one.
+
+    Args:
+        recipe_name: The name of the recipe the data is related to.
+        metadata: A `RecipeCache` dictionary to store in the cache.
+    """
+    _pending_updates[recipe_name] = metadata
 
 
 def save_metadata_cache(
@@ -204,9 +316,28 @@ def save_metadata_cache(
         recipe_name: The name of the recipe the data is related to.
         metadata: A `RecipeCache` dictionary to store in the file.
     """
-    stored_metadata = load_metadata_cache(file_path)
+    save_metadata_cache_batch(file_path, {recipe_name: metadata})
+
+
+def save_metadata_cache_batch(file_path: Path, updates: MetadataCache) -> None:
+    """Save the metadata of several recipes to the cache.
 
-    new_metadata = stored_metadata.copy()
-    new_metadata[recipe_name] = metadata
+    Merges all of the updates into the in-memory cache, reading the cache
+    file only if this process has not loaded it yet, and writes it back
+    once. The new contents are written to a temporary file next to the
+    cache and moved into place, so an interrupted write never leaves a
+    truncated cache behind.
 
-    file_path.write_text(json.dumps(new_metadata, indent=2, sort_keys=True))
+    Args:
+        file_path: The path to the metadata cache JSON file.
+        updates: A `MetadataCache` dictionary mapping recipe names to the
+            `RecipeCache` dictionaries to store in the file.
+    """
+    new_metadata = _get_metadata_cache(file_path)
+    new_metadata.update(updates)
+
+    tmp_path = file_path.with_suffix(file_path.suffix + ".tmp")
+    tmp_path.write_bytes(
+        orjson.dumps(new_metadata, option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS)
+    )
+    os.replace(tmp_path, file_path)
@@ -11,6 +11,8 @@ Key classes:
   managing trust information.
 """
 
+import functools
+import os
 import plistlib
 import tempfile
 from datetime import datetime
@@ -20,13 +22,20 @@ from typing import Any, Iterable, Optional, TypedDict
 
 import yaml
 
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeLoader as _YamlLoader
+
 from cloud_autopkg_runner import AppConfig, logger
 from cloud_autopkg_runner.exceptions import AutoPkgRunnerException
 from cloud_autopkg_runner.metadata_cache import (
+    ETAG_XATTR,
+    LAST_MODIFIED_XATTR,
     DownloadMetadata,
     RecipeCache,
     get_file_metadata,
-    save_metadata_cache,
+    queue_metadata_update,
 )
 from cloud_autopkg_runner.recipe_report import ConsolidatedReport, RecipeReport
 from cloud_autopkg_runner.shell import run_cmd
@@ -72,6 +81,13 @@ class RecipeFormat(StrEnum):
     PLIST = "plist"
 
 
+_SUFFIX_FORMATS: dict[str, RecipeFormat] = {
+    ".yaml": RecipeFormat.YAML,
+    ".plist": RecipeFormat.PLIST,
+    ".recipe": RecipeFormat.PLIST,
+}
+
+
 class Recipe:
     """Represents an AutoPkg recipe.
 
@@ -81,7 +97,8 @@ class Recipe:
     Attributes:
         _path: Path to the recipe file.
         _format: RecipeFormat enum value representing the file format.
-        _contents: RecipeContents dictionary containing the parsed recipe contents.
+        contents: RecipeContents dictionary containing the parsed recipe contents.
+            The recipe file is only read and parsed on first access.
         _trusted: TrustInfoVerificationState enum value representing the trust
             information verification state.
         _result: RecipeReport object for storing the results of running the recipe.
@@ -100,18 +117,22 @@ class Recipe:
 
         self._path: Path = recipe_path
         self._format: RecipeFormat = self.format()
-        self._contents: RecipeContents = self._get_contents()
         self._trusted: TrustInfoVerificationState = TrustInfoVerificationState.UNTESTED
         self._result: RecipeReport = RecipeReport(report_dir)
 
-    @property
+    @functools.cached_property
     def contents(self) -> RecipeContents:
         """Returns the recipe's contents as a dictionary.
 
+        The recipe file is parsed on first access and the result is cached.
+
         Returns:
             The recipe's contents as a RecipeContents TypedDict.
+
+        Raises:
+            AutoPkgRunnerException: If the file is invalid or cannot be parsed.
         """
-        return self._contents
+        return self._get_contents()
 
     @property
     def description(self) -> str:
@@ -121,9 +142,9 @@ class Recipe:
             The recipe's description as a string.  Returns an empty string
             if the recipe does not have a description.
         """
-        if self._contents["Description"] is None:
+        if self.contents["Description"] is None:
             return ""
-        return self._contents["Description"]
+        return self.contents["Description"]
 
     @property
     def identifier(self) -> str:
@@ -132,7 +153,7 @@ class Recipe:
         Returns:
             The recipe's identifier as a string.
         """
-        return self._contents["Identifier"]
+        return self.contents["Identifier"]
 
     @property
     def input(self) -> dict[str, Any]:
@@ -142,7 +163,7 @@ class Recipe:
             The recipe's input dictionary, containing the input variables
             used by the recipe.
         """
-        return self._contents["Input"]
+        return self.contents["Input"]
 
     @property
     def input_name(self) -> str:
@@ -155,7 +176,7 @@ class Recipe:
             AutoPkgRunnerException: If the recipe does not contain a NAME input variable.
         """
         try:
-            return self._contents["Input"]["NAME"]
+            return self.contents["Input"]["NAME"]
         except AttributeError:
             raise AutoPkgRunnerException(
                 f"Failed to get recipe name from {self._path} contents."
@@ -169,9 +190,9 @@ class Recipe:
             The recipe's minimum version as a string.  Returns an empty string
             if the recipe does not have a minimum version specified.
         """
-        if self._contents["MinimumVersion"] is None:
+        if self.contents["MinimumVersion"] is None:
             return ""
-        return self._contents["MinimumVersion"]
+        return self.contents["MinimumVersion"]
 
     @property
     def name(self) -> str:
@@ -190,9 +211,9 @@ class Recipe:
             The recipe's parent recipe identifier as a string.  Returns an empty
             string if the recipe does not have a parent recipe.
         """
-        if self._contents["ParentRecipe"] is None:
+        if self.contents["ParentRecipe"] is None:
             return ""
-        return self._contents["ParentRecipe"]
+        return self.contents["ParentRecipe"]
 
     @property
     def process(self) -> Iterable[dict[str, Any]]:
@@ -202,7 +223,7 @@ class Recipe:
             The recipe's process array, which is an iterable of dictionaries
             defining the steps in the recipe's processing workflow.
         """
-        return self._contents["Process"]
+        return self.contents["Process"]
 
     def _autopkg_run_cmd(self, check: bool = False) -> list[str]:
         """Constructs the command-line arguments for running AutoPkg.
@@ -214,46 +235,22 @@ class Recipe:
             The command to run AutoPkg with this recipe.
         """
         cmd = [
-            "/usr/local/bin/autopkg",
+            "autopkg",
             "run",
             self.name,
             f"--override-dir={self._path.parent}",
             f"--report-plist={self._result.file_path()}",
         ]
 
-        if AppConfig.verbosity_int(-1) > 0:
-            cmd.append(AppConfig.verbosity_str(-1))
+        verbosity = AppConfig.verbosity_str(-1)
+        if verbosity:
+            cmd.append(verbosity)
 
         if check:
             cmd.append("--check")
 
         return cmd
 
-    def _extract_download_paths(
-        self, download_items: list[dict[str, Any]]
-    ) -> list[str]:
-        """Extracts 'download_path' values from a list of dictionaries.
-
-        This function assumes that each dictionary in the input list has a structure like:
-        {'downloaded_items': [{'download_path': 'path_to_file'}]}
-
-        Args:
-            download_items: A list of dictionaries, where each dictionary is
-                expected to have a "downloaded_items" key containing a list of
-                dictionaries, and each of those dictionaries is expected to have
-                a "download_path" key with a string value.
-
-        Returns:
-            A list of strings, where each string is the 'download_path' value from
-            the first dictionary in the "downloaded_items" list of each input dictionary.
-            Returns an empty list if the input is empty, any of the intermediate
-            keys are missing, or the "downloaded_items" list is empty.
-        """
-        if not download_items:
-            return []
-
-        return [item["download_path"] for item in download_items]
-
     def _get_contents(self) -> RecipeContents:
         """Read and parse the recipe file.
 
@@ -263,17 +260,17 @@ class Recipe:
         Raises:
             AutoPkgRunnerException: If the file is invalid or cannot be parsed.
         """
-        file_contents = self._path.read_text()
+        file_contents = self._path.read_bytes()
 
         if self._format == RecipeFormat.YAML:
             return self._get_contents_yaml(file_contents)
         return self._get_contents_plist(file_contents)
 
-    def _get_contents_plist(self, file_contents: str) -> RecipeContents:
+    def _get_contents_plist(self, file_contents: bytes) -> RecipeContents:
         """Parse a recipe in PLIST format.
 
         Args:
-            file_contents: The recipe file contents as a string.
+            file_contents: The recipe file contents as bytes.
 
         Returns:
             A dictionary containing the recipe's contents.
@@ -282,17 +279,19 @@ class Recipe:
             AutoPkgRunnerException: If the PLIST file is invalid.
         """
         try:
-            return plistlib.loads(file_contents.encode())
+            return plistlib.loads(file_contents)
         except plistlib.InvalidFileException as exc:
             raise AutoPkgRunnerException(
                 f"Invalid file contents in {self._path}"
             ) from exc
 
-    def _get_contents_yaml(self, file_contents: str) -> RecipeContents:
+    def _get_contents_yaml(self, file_contents: bytes) -> RecipeContents:
         """Parse a recipe in YAML format.
 
+        Uses libyaml's C loader when PyYAML was built with it.
+
         Args:
-            file_contents: The recipe file contents as a string.
+            file_contents: The recipe file contents as bytes.
 
         Returns:
             A dictionary containing the recipe's contents.
@@ -301,7 +300,7 @@ class Recipe:
             AutoPkgRunnerException: If the YAML file is invalid.
         """
         try:
-            return yaml.safe_load(file_contents)
+            return yaml.load(file_contents, Loader=_YamlLoader)
         except yaml.YAMLError as exc:
             raise AutoPkgRunnerException(
                 f"Invalid file contents in {self._path}"
@@ -319,20 +318,21 @@ class Recipe:
         """
         metadata_list: list[DownloadMetadata] = []
 
-        for downloaded_item in self._extract_download_paths(download_items):
-            downloaded_item_path = Path(downloaded_item)
-            metadata_list.append(
-                {
-                    "etag": get_file_metadata(
-                        downloaded_item_path, "com.github.autopkg.etag"
-                    ),
-                    "file_size": downloaded_item_path.stat().st_size,
-                    "last_modified": get_file_metadata(
-                        downloaded_item_path, "com.github.autopkg.last-modified"
-                    ),
-                    "file_path": downloaded_item,
-                }
-            )
+        for item in download_items:
+            downloaded_item = item["download_path"]
+            # Open each file once and read its size and xattrs through the fd
+            fd = os.open(downloaded_item, os.O_RDONLY)
+            try:
+                metadata_list.append(
+                    {
+                        "etag": get_file_metadata(fd, ETAG_XATTR),
+                        "file_size": os.fstat(fd).st_size,
+                        "last_modified": get_file_metadata(fd, LAST_MODIFIED_XATTR),
+                        "file_path": downloaded_item,
+                    }
+                )
+            finally:
+                os.close(fd)
 
         return {"timestamp": str(datetime.now()), "metadata": metadata_list}
 
@@ -355,19 +355,23 @@ class Recipe:
         Raises:
             AutoPkgRunnerException: If the file extension is not recognized.
         """
-        if self._path.suffix == ".yaml":
-            return RecipeFormat.YAML
-        elif self._path.suffix in [".plist", ".recipe"]:
-            return RecipeFormat.PLIST
-        raise AutoPkgRunnerException(f"Invalid recipe format: {self._path.suffix}")
+        suffix = self._path.suffix
+        try:
+            return _SUFFIX_FORMATS[suffix]
+        except KeyError:
+            raise AutoPkgRunnerException(f"Invalid recipe format: {suffix}") from None
 
     async def run(self) -> ConsolidatedReport:
         """Runs the recipe and saves metadata.
 
         This method first performs a check phase to determine if there are any
         updates available. If updates are available, it extracts metadata from
-        the downloaded files, saves the metadata to the cache, and then performs
-        a full run of the recipe.
+        the downloaded files, queues the metadata to be saved to the cache by
+        `flush_metadata_cache`, and then performs a full run of the recipe.
+
+        `process_recipe_list` flushes the queued metadata once all of its
+        recipes have finished. Callers running a recipe directly must call
+        `flush_metadata_cache` themselves, or the metadata is not saved.
 
         Returns:
             A ConsolidatedReport object containing the results of the recipe run.
@@ -375,7 +379,7 @@ class Recipe:
         output = await self.run_check_phase()
         if output["downloaded_items"]:
             metadata = self._get_metadata(output["downloaded_items"])
-            save_metadata_cache(AppConfig.cache_file(), self.name, metadata)
+            queue_metadata_update(self.name, metadata)
 
             return await self.run_full()
         return output
@@ -441,7 +445,7 @@ class Recipe:
         logger.debug(f"Updating trust info for {self.name}...")
 
         cmd = [
-            "/usr/local/bin/autopkg",
+            "autopkg",
             "update-trust-info",
             self.name,
             f"--override-dir={self._path.parent}",
@@ -471,14 +475,15 @@ class Recipe:
             logger.debug(f"Verifying trust info for {self.name}...")
 
             cmd = [
-                "/usr/local/bin/autopkg",
+                "autopkg",
                 "verify-trust-info",
                 self.name,
                 f"--override-dir={self._path.parent}",
             ]
 
-            if AppConfig.verbosity_int() > 0:
-                cmd.append(AppConfig.verbosity_str())
+            verbosity = AppConfig.verbosity_str()
+            if verbosity:
+                cmd.append(verbosity)
 
             returncode, _stdout, _stderr = await run_cmd(cmd, check=False)
 
@@ -6,20 +6,212 @@ interact with external tools and processes during AutoPkg workflows.
 """
 
 import asyncio
+import functools
+import os
 import shlex
-from typing import Optional, Union
+import shutil
+import signal
+from logging import DEBUG
+from typing import (
+    Iterable,
+    Literal,
+    NamedTuple,
+    Optional,
+    Sequence,
+    TypeAlias,
+    Union,
+    overload,
+)
 
 from cloud_autopkg_runner import logger
-from cloud_autopkg_runner.exceptions import AutoPkgRunnerException
+from cloud_autopkg_runner.exceptions import (
+    AutoPkgRunnerException,
+    CommandFailedException,
+)
 
+CaptureOutput: TypeAlias = Union[bool, Literal["inherit", "stdout", "stderr"]]
+"""Type alias for the output capturing modes accepted by `run_cmd`."""
 
+_READ_SIZE = 64 * 1024
+"""Number of bytes requested from a subprocess pipe per read."""
+
+_TERMINATE_GRACE_PERIOD = 1.0
+"""Seconds a stopped command is given to exit after SIGTERM before SIGKILL."""
+
+_DEFAULT_EXECUTABLE_PATHS: dict[str, str] = {"autopkg": "/usr/local/bin/autopkg"}
+"""Install locations used for executables that cannot be found on the PATH."""
+
+
+class RunResults(NamedTuple):
+    """Results of running a batch of commands with `run_cmds`.
+
+    Each list holds one entry per command, in the order the commands were
+    given.
+
+    Attributes:
+        returncodes: The exit code of each command.
+        stdouts: The standard output of each command.
+        stderrs: The standard error of each command.
+    """
+
+    returncodes: list[int]
+    stdouts: list[str]
+    stderrs: list[str]
+
+
+class _JoinedCmd:
+    """A command's arguments, joined into a string only when formatted.
+
+    Used in place of the command string for list commands, so the join is
+    skipped entirely unless a log record or error message needs it.
+    """
+
+    __slots__ = ("_parts",)
+
+    def __init__(self, parts: Sequence[str]) -> None:
+        """Initialize a _JoinedCmd object.
+
+        Args:
+            parts: The command and its arguments.
+        """
+        self._parts = parts
+
+    def __str__(self) -> str:
+        """Returns the arguments as a shell-quoted command line."""
+        return shlex.join(self._parts)
+
+
+@functools.lru_cache(maxsize=256)
+def _split_cmd(cmd: str) -> tuple[str, ...]:
+    """Split a command string into its arguments.
+
+    Results are cached, since the same command strings tend to be run
+    repeatedly.
+
+    Args:
+        cmd: The command string to split.
+
+    Returns:
+        The command and its arguments.
+
+    Raises:
+        ValueError: If the command string cannot be parsed.
+    """
+    return tuple(shlex.split(cmd))
+
+
+@functools.lru_cache(maxsize=64)
+def _resolve_executable(name: str) -> str:
+    """Resolve a command name to the executable that would be run.
+
+    Bare names are looked up on the PATH once and the result is cached, so
+    each exec does not search the PATH again. Names missing from the PATH
+    fall back to their default install location, if known. Names containing
+    a path separator are returned unchanged, since they are resolved
+    relative to the command's working directory.
+
+    Args:
+        name: The command name or path.
+
+    Returns:
+        The absolute path to the executable, or `name` if it is a path or
+        cannot be found.
+    """
+    if os.sep in name:
+        return name
+    return shutil.which(name) or _DEFAULT_EXECUTABLE_PATHS.get(name, name)
+
+
+async def _drain(reader: Optional[asyncio.StreamReader]) -> bytearray:
+    """Read a subprocess stream until EOF.
+
+    Args:
+        reader: The stream to read, or `None` if it was not captured.
+
+    Returns:
+        Everything read from the stream, in a single buffer.
+    """
+    buf = bytearray()
+    if reader is not None:
+        while chunk := await reader.read(_READ_SIZE):
+            buf.extend(chunk)
+    return buf
+
+
+async def _stop_process(proc: asyncio.subprocess.Process) -> None:
+    """Stop a running command and wait for it to exit.
+
+    Commands are started in their own session, so the whole process group,
+    including any children the command started (such as the `curl` or
+    `hdiutil` processes run by AutoPkg), is sent SIGTERM and, if the command
+    has not exited after `_TERMINATE_GRACE_PERIOD` seconds, SIGKILL. Waiting
+    reaps the child and lets its pipes be closed straight away. Each wait is
+    bounded, because the wait only completes once the pipes close, and a
+    process that left the group could hold them open indefinitely.
+
+    Args:
+        proc: The process to stop.
+    """
+    for sig in (signal.SIGTERM, signal.SIGKILL):
+        try:
+            os.killpg(proc.pid, sig)
+        except (ProcessLookupError, PermissionError):
+            pass  # Every process in the group has already exited
+        try:
+            await asyncio.wait_for(proc.wait(), timeout=_TERMINATE_GRACE_PERIOD)
+            return
+        except asyncio.TimeoutError:
+            pass  # Escalate to SIGKILL, or give up on pipes held open
+
+
+def _decode(data: Union[bytes, bytearray]) -> str:
+    """Decode command output, replacing any invalid UTF-8.
+
+    Output is usually plain ASCII, which is checked for first and decoded
+    without going through the error-handling UTF-8 decoder.
+
+    Args:
+        data: The raw output of a command.
+
+    Returns:
+        The decoded output.
+    """
+    if data.isascii():
+        return data.decode("ascii")
+    return data.decode("utf-8", errors="replace")
+
+
+@overload
+async def run_cmd(
+    cmd: Union[str, list[str]],
+    cwd: Optional[str] = None,
+    check: bool = True,
+    capture_output: CaptureOutput = True,
+    timeout: Optional[int] = None,
+    decode: Literal[True] = True,
+) -> tuple[int, str, str]: ...
+
+
+@overload
 async def run_cmd(
     cmd: Union[str, list[str]],
     cwd: Optional[str] = None,
     check: bool = True,
-    capture_output: bool = True,
+    capture_output: CaptureOutput = True,
     timeout: Optional[int] = None,
-) -> tuple[int, str, str]:
+    *,
+    decode: Literal[False],
+) -> tuple[int, bytes, bytes]: ...
+
+
+async def run_cmd(
+    cmd: Union[str, list[str]],
+    cwd: Optional[str] = None,
+    check: bool = True,
+    capture_output: CaptureOutput = True,
+    timeout: Optional[int] = None,
+    decode: bool = True,
+) -> Union[tuple[int, str, str], tuple[int, bytes, bytes]]:
     """Asynchronously executes a command in a subprocess.
 
     This function provides a robust and flexible way to run shell commands,
@@ -37,37 +229,48 @@ async def run_cmd(
             exit code. If `False`, the function will not raise an exception for
             non-zero exit codes, and the caller is responsible for checking the
             returned exit code.
-        capture_output: A boolean value. If `True` (the default), the
-            command's standard output and standard error are captured and
-            returned as strings. If `False`, the command's output is directed
-            to the parent process's standard output and standard error, and
-            empty strings are returned for stdout and stderr.
+        capture_output: If `True` (the default), the command's standard
+            output and standard error are captured and returned as strings.
+            If `"stdout"` or `"stderr"`, only that stream is captured and the
+            other is discarded. If `False`, the command's output is discarded.
+            If `"inherit"`, the command's output is directed to the parent
+            process's standard output and standard error. Empty strings are
+            returned for any stream that is not captured.
         timeout: An optional integer specifying a timeout in seconds. If the
-            command exceeds this timeout, it will be terminated, and the
-            function will return a -1 returncode. If `None`, the command will
-            run without a timeout.
+            command exceeds this timeout, it will be terminated along with
+            any processes it started (and killed if it does not exit
+            promptly), and the function will return a -1 returncode. If
+            `None`, the command will run without a timeout. If the call is
+            cancelled, the command is stopped the same way before the
+            cancellation propagates.
+        decode: If `True` (the default), stdout and stderr are decoded and
+            returned as strings. If `False`, they are returned as the raw
+            bytes written by the command, and are only decoded if they need
+            to be logged.
 
     Returns:
         A tuple containing:
             - returncode (int): The exit code of the command. It will be -1 if the
               command times out or if another error prevents the process from
               completing.
-            - stdout (str): The standard output of the command (if
-              `capture_output` is `True`).
-            - stderr (str): The standard error of the command (if
-              `capture_output` is `True`).
+            - stdout (str or bytes): The standard output of the command (if
+              it is captured).
+            - stderr (str or bytes): The standard error of the command (if
+              it is captured).
 
     Raises:
         AutoPkgRunnerException: If any of the following occur:
             - The `cmd` string is invalid and cannot be parsed by `shlex.split()`.
             - The command returns a non-zero exit code and `check` is `True`.
+              A `CommandFailedException` is raised in this case.
             - A `FileNotFoundError` occurs (the command is not found).
             - An `OSError` occurs during subprocess creation.
-            - Any other unexpected exception occurs during command execution.
     """
+    cmd_list: Sequence[str]
+    cmd_str: Union[str, _JoinedCmd]
     if isinstance(cmd, str):
         try:
-            cmd_list = shlex.split(cmd)
+            cmd_list = _split_cmd(cmd)
             cmd_str = cmd
         except ValueError as exc:
             raise AutoPkgRunnerException(
@@ -75,48 +278,62 @@ async def run_cmd(
             ) from exc
     else:
         cmd_list = cmd
-        cmd_str = " ".join(cmd)
+        cmd_str = _JoinedCmd(cmd)
 
-    logger.debug(f"Running command: {cmd_str}")
+    logger.debug("Running command: %s", cmd_str)
     if cwd:
-        logger.debug(f"  in directory: {cwd}")
+        logger.debug("  in directory: %s", cwd)
 
     returncode: int = -1
+    stdout_buf: Union[bytes, bytearray] = b""
+    stderr_buf: Union[bytes, bytearray] = b""
+
+    stdout_dest: Optional[int]
+    stderr_dest: Optional[int]
+    if capture_output == "inherit":
+        stdout_dest = stderr_dest = None
+    elif capture_output == "stdout":
+        stdout_dest, stderr_dest = asyncio.subprocess.PIPE, asyncio.subprocess.DEVNULL
+    elif capture_output == "stderr":
+        stdout_dest, stderr_dest = asyncio.subprocess.DEVNULL, asyncio.subprocess.PIPE
+    elif capture_output:
+        stdout_dest = stderr_dest = asyncio.subprocess.PIPE
+    else:
+        stdout_dest = stderr_dest = asyncio.subprocess.DEVNULL
+    capturing = asyncio.subprocess.PIPE in (stdout_dest, stderr_dest)
 
     try:
-        if capture_output:
-            proc = await asyncio.create_subprocess_exec(
-                *cmd_list,
-                cwd=cwd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-            )
-        else:
-            proc = await asyncio.create_subprocess_exec(*cmd_list, cwd=cwd)
+        proc = await asyncio.create_subprocess_exec(
+            _resolve_executable(cmd_list[0]),
+            *cmd_list[1:],
+            cwd=cwd,
+            stdout=stdout_dest,
+            stderr=stderr_dest,
+            start_new_session=True,
+        )
 
         try:
-            if capture_output:
-                stdout_bytes, stderr_bytes = await asyncio.wait_for(
-                    proc.communicate(), timeout=timeout
+            if capturing:
+                stdout_buf, stderr_buf, _ = await asyncio.wait_for(
+                    asyncio.gather(
+                        _drain(proc.stdout), _drain(proc.stderr), proc.wait()
+                    ),
+                    timeout=timeout,
                 )
-                stdout = stdout_bytes.decode("utf-8", errors="replace")
-                stderr = stderr_bytes.decode("utf-8", errors="replace")
             else:
                 await asyncio.wait_for(proc.wait(), timeout=timeout)
-                stdout, stderr = "", ""  # No output captured
 
+        except asyncio.CancelledError:
+            await _stop_process(proc)
+            raise
         except asyncio.TimeoutError:
-            logger.warning(f"Command timed out: {cmd_str}")
-            if proc.returncode is None:  # Process still running
-                try:
-                    proc.kill()
-                except ProcessLookupError:
-                    pass  # Process already terminated
-
-            stdout = ""
-            stderr = f"Command timed out after {timeout} seconds."
+            logger.warning("Command timed out: %s", cmd_str)
+            await _stop_process(proc)
 
-            return returncode, stdout, stderr
+            message = f"Command timed out after {timeout} seconds."
+            if decode:
+                return returncode, "", message
+            return returncode, b"", message.encode()
 
         returncode = proc.returncode if proc.returncode is not None else -1
 
@@ -126,21 +343,111 @@ async def run_cmd(
         raise AutoPkgRunnerException(
             f"OS error running command: {cmd_str}. Error: {exc}"
         ) from exc
-    except Exception as exc:
-        raise AutoPkgRunnerException(
-            f"Unexpected error running command: {cmd_str}. Error: {exc}"
-        ) from exc
 
     if check and returncode != 0:
-        logger.error(f"Command failed: {cmd_str}")
-        logger.error(f"  Exit code: {returncode}")
-        logger.error(f"  Stdout: {stdout}")
-        logger.error(f"  Stderr: {stderr}")
+        stdout = _decode(stdout_buf)
+        stderr = _decode(stderr_buf)
+        logger.error("Command failed: %s", cmd_str)
+        logger.error("  Exit code: %s", returncode)
+        logger.error("  Stdout: %s", stdout)
+        logger.error("  Stderr: %s", stderr)
+        raise CommandFailedException(cmd_list, returncode, stdout, stderr)
+
+    if not decode:
+        if capturing and logger.isEnabledFor(DEBUG):
+            logger.debug(
+                "Command output:\n%s\n%s", _decode(stdout_buf), _decode(stderr_buf)
+            )
+        return returncode, bytes(stdout_buf), bytes(stderr_buf)
+
+    stdout = _decode(stdout_buf)
+    stderr = _decode(stderr_buf)
+    if capturing:
+        logger.debug("Command output:\n%s\n%s", stdout, stderr)
+
+    return returncode, stdout, stderr
+
+
+async def run_cmds(
+    cmds: Iterable[Union[str, list[str]]],
+    concurrency: Optional[int] = None,
+    cwd: Optional[str] = None,
+    check: bool = True,
+    capture_output: CaptureOutput = True,
+    timeout: Optional[int] = None,
+) -> RunResults:
+    """Asynchronously executes several commands, a limited number at a time.
+
+    Each command is run with `run_cmd`, using the same options for all of
+    them.
+
+    Args:
+        cmds: The commands to execute. See `run_cmd` for accepted forms.
+        concurrency: The maximum number of commands to run at the same time.
+            If `None`, the number of CPUs is used.
+        cwd: See `run_cmd`.
+        check: See `run_cmd`.
+        capture_output: See `run_cmd`.
+        timeout: See `run_cmd`. Applies to each command separately.
+
+    Returns:
+        A `RunResults` tuple of parallel lists holding the exit code, stdout,
+        and stderr of each command, in the same order as `cmds`.
+
+    Raises:
+        AutoPkgRunnerException: If `concurrency` is less than 1, or if
+            `run_cmd` raises for any of the commands. As soon as one command
+            fails, the commands still running or waiting to run are
+            cancelled, and their processes stopped, before the exception is
+            raised.
+    """
+    if concurrency is None:
+        concurrency = os.cpu_count() or 1
+    elif concurrency < 1:
         raise AutoPkgRunnerException(
-            f"Command failed with exit code {returncode}: {cmd_str}"
+            f"concurrency must be at least 1, got {concurrency}"
         )
 
-    if capture_output:
-        logger.debug(f"Command output:\n{stdout}\n{stderr}")
+    cmds = list(cmds)
+    returncodes = [-1] * len(cmds)
+    stdouts = [""] * len(cmds)
+    stderrs = [""] * len(cmds)
+    semaphore = asyncio.Semaphore(concurrency)
 
-    return returncode, stdout, stderr
+    failed = False
+
+    async def run_one(index: int, cmd: Union[str, list[str]]) -> None:
+        nonlocal failed
+        async with semaphore:
+            # A command waiting on the semaphore can be admitted by a failed
+            # one before it is cancelled, so check before starting it
+            if failed:
+                return
+            try:
+                returncodes[index], stdouts[index], stderrs[index] = await run_cmd(
+                    cmd,
+                    cwd=cwd,
+                    check=check,
+                    capture_output=capture_output,
+                    timeout=timeout,
+                )
+            except Exception:
+                failed = True
+                raise
+
+    tasks = [asyncio.create_task(run_one(index, cmd)) for index, cmd in enumerate(cmds)]
+    if tasks:
+        try:
+            await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        finally:
+            # Cancel whatever is left after a failure (or cancellation of this
+            # call), and wait for those commands to be stopped
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    for task in tasks:
+        if not task.cancelled() and (exc := task.exception()) is not None:
+            raise exc
+
+    return RunResults(returncodes, stdouts, stderrs)